@@ -0,0 +1,67 @@
+# _odes.pyx
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+"""
+Ahead-of-time compiled right-hand side of the viral-immune ODE system.
+
+Mirrors models._rhs for platforms without Numba. Build in place with:
+
+    cythonize -i src/_odes.pyx
+"""
+
+import numpy as np
+from libc.math cimport exp
+
+# Beyond this distance (days) from tau the activation sigmoid is 0 or 1 to
+# double precision (matches models._ACTIVATION_CUTOFF)
+cdef double _ACTIVATION_CUTOFF = 13.0
+
+cdef inline double _immune_scaling(double t, double tau) nogil:
+    """Smooth immune activation sigmoid, short-circuited when fully off or on."""
+    if t < tau - _ACTIVATION_CUTOFF:
+        return 0.0
+    if t > tau + _ACTIVATION_CUTOFF:
+        return 1.0
+    return 1.0 / (1.0 + exp(-3.0 * (t - tau)))
+
+cdef void _rhs_c(const double[::1] state, double t, const double[::1] p,
+                 double[::1] out) noexcept nogil:
+    """Write the derivatives [dV/dt, dI/dt, dT/dt, dA/dt] into out."""
+    cdef double V = state[0]
+    cdef double I = state[1]
+    cdef double T = state[2]
+    cdef double A = state[3]
+
+    cdef double immune_scaling = _immune_scaling(t, p[10])
+
+    # Viral dynamics
+    out[0] = p[2] * I - p[3] * V - p[5] * A * V - 0.005 * T * V
+
+    # Infected cell dynamics
+    out[1] = p[0] * V * (1.0 - I / 1e3) - p[1] * I - p[4] * T * I
+
+    # T cell dynamics
+    out[2] = (immune_scaling * p[6] * T * I / (p[7] + I)
+              + p[11] * I * T / (100.0 + I)
+              - p[8] * T)
+
+    # Antibody dynamics
+    out[3] = (immune_scaling * p[12] * V * T / (100.0 + V)
+              + immune_scaling * 0.1 * I
+              - p[9] * A)
+
+def rhs(state, double t, p):
+    """
+    Compiled right-hand side with the same signature as models._rhs.
+
+    Args:
+        state: Current state vector [V, I, T, A]
+        t: Current time point
+        p: Packed parameter array (see models.PARAM_NAMES)
+
+    Returns:
+        Array of derivatives [dV/dt, dI/dt, dT/dt, dA/dt]
+    """
+    out = np.empty(4)
+    _rhs_c(np.ascontiguousarray(state, dtype=np.float64), t,
+           np.ascontiguousarray(p, dtype=np.float64), out)
+    return out
@@ -0,0 +1,55 @@
+# _viz_kernels.py
+
+import numpy as np
+from numba import njit, prange
+
+@njit(cache=True, fastmath=True, parallel=True)
+def lttb_indices(t: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select points per column with Largest-Triangle-Three-Buckets.
+    
+    Args:
+        t: Time points array with shape (N,)
+        y: Series array with shape (N, n_cols)
+        n_out: Number of points to keep per column (at least 3)
+        
+    Returns:
+        Integer array of selected row indices with shape (n_out, n_cols)
+    """
+    n = t.size
+    n_cols = y.shape[1]
+    idx = np.empty((n_out, n_cols), dtype=np.int64)
+    every = (n - 2) / (n_out - 2)
+
+    for col in prange(n_cols):
+        a = 0
+        idx[0, col] = 0
+        for i in range(n_out - 2):
+            # Average of the next bucket is the third triangle vertex
+            avg_start = int(np.floor((i + 1) * every)) + 1
+            avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+            avg_t = 0.0
+            avg_y = 0.0
+            for j in range(avg_start, avg_end):
+                avg_t += t[j]
+                avg_y += y[j, col]
+            count = max(avg_end - avg_start, 1)
+            avg_t /= count
+            avg_y /= count
+
+            # Keep the point of the current bucket with the largest triangle
+            start = int(np.floor(i * every)) + 1
+            end = int(np.floor((i + 1) * every)) + 1
+            best = start
+            best_area = -1.0
+            for j in range(start, end):
+                area = abs((t[a] - avg_t) * (y[j, col] - y[a, col])
+                           - (t[a] - t[j]) * (avg_y - y[a, col]))
+                if area > best_area:
+                    best_area = area
+                    best = j
+            idx[i + 1, col] = best
+            a = best
+        idx[n_out - 1, col] = n - 1
+
+    return idx
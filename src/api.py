@@ -1,17 +1,18 @@
 # api.py
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import logging
+import asyncio
 import io
-import tempfile
 import base64
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 from .models import ViralImmunityModel
 from .config import ModelConfig
@@ -25,7 +26,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Viral Infection & Immune Response API",
     description="API for running viral infection simulations and generating visualizations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -37,10 +39,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON and CSV responses for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Initialize components
 config = ModelConfig()
 model = ViralImmunityModel(config.PARAMS)
-plotter = ViralSimulationPlotter()
+plotter = ViralSimulationPlotter({**config.PLOT_SETTINGS, "headless": True})
+
+# Default inputs, built once instead of per request
+_T_DEFAULT = np.linspace(0, config.SIMULATION_TIME["end"], config.SIMULATION_TIME["output_points"])
+_Y0_DEFAULT = np.fromiter(config.INITIAL_CONDITIONS.values(), dtype=np.float64, count=4)
+_Y0_KEY = tuple(_Y0_DEFAULT.tolist())
+_DEFAULT_PARAMS_KEY = tuple(sorted(config.PARAMS.items()))
+_T_DEFAULT.setflags(write=False)
+_Y0_DEFAULT.setflags(write=False)
+
+# Upper bound on the number of runs accepted by a single sweep request
+_MAX_SWEEP_RUNS = 1000
+# Upper bound on requested output points, ten times the full-resolution grid
+_MAX_POINTS = config.SIMULATION_TIME["steps"] * 10
+# Upper bound on runs x output points in one sweep, which sets the size of
+# the result array and JSON payload (the most runs at the default grid)
+_MAX_SWEEP_VALUES = _MAX_SWEEP_RUNS * config.SIMULATION_TIME["output_points"]
+
+@lru_cache(maxsize=32)
+def _cached_sim(params_key: Tuple[Tuple[str, float], ...],
+                ics_key: Tuple[float, ...],
+                t_end: float,
+                steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run and memoize a simulation for a given parameter set and time grid.
+    
+    The returned arrays are shared between callers and marked read-only;
+    copy them before modifying.
+    """
+    t = np.linspace(0, t_end, steps)
+    results = ViralImmunityModel(dict(params_key)).simulate(t, list(ics_key))
+    t.setflags(write=False)
+    results.setflags(write=False)
+    return t, results
+
+def _run_sim(params: Dict[str, float], t_end: float, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Run a simulation through the result cache."""
+    params_key = _DEFAULT_PARAMS_KEY if params is config.PARAMS else tuple(sorted(params.items()))
+    return _cached_sim(
+        params_key,
+        _Y0_KEY,
+        float(t_end),
+        int(steps)
+    )
 
 # Mount static files
 static_path = Path("frontend/static")
@@ -65,32 +113,26 @@ async def run_simulation_api(
     beta: Optional[float] = None,
     delta: Optional[float] = None,
     k_t: Optional[float] = None,
-    k_a: Optional[float] = None
+    k_a: Optional[float] = None,
+    n_points: Optional[int] = None
 ) -> Dict[str, Any]:
     """Run viral infection simulation with optional parameters."""
     try:
-        # Create simulation parameters
-        params = config.PARAMS.copy()
-        
-        # Update parameters if provided
-        if beta is not None:
-            params["beta"] = beta
-        if delta is not None:
-            params["delta"] = delta
-        if k_t is not None:
-            params["k_t"] = k_t
-        if k_a is not None:
-            params["k_a"] = k_a
-
-        # Create time points
-        t_end = duration if duration is not None else config.SIMULATION_TIME["end"]
-        t = np.linspace(0, t_end, config.SIMULATION_TIME["steps"])
-        
+        # Merge any provided parameter overrides onto the defaults
+        overrides = {
+            name: value
+            for name, value in {"beta": beta, "delta": delta, "k_t": k_t, "k_a": k_a}.items()
+            if value is not None
+        }
+        params = {**config.PARAMS, **overrides} if overrides else config.PARAMS
+
         # Run simulation with updated parameters
-        model = ViralImmunityModel(params)
-        results = model.simulate(t, list(config.INITIAL_CONDITIONS.values()))
+        t_end = duration if duration is not None else config.SIMULATION_TIME["end"]
+        steps = _resolve_points(n_points)
+        t, results = await asyncio.to_thread(_run_sim, params, t_end, steps)
         
-        # Get derived quantities
+        # Get derived quantities (these depend only on the results, so the
+        # shared model serves every parameter set)
         metrics = model.get_derived_quantities(t, results)
         
         # Check simulation stability
@@ -101,11 +143,11 @@ async def run_simulation_api(
         response_data = {
             "success": True,
             "data": {
-                "time": t.tolist(),
-                "viral_load": results[:, 0].tolist(),
-                "infected_cells": results[:, 1].tolist(),
-                "t_cells": results[:, 2].tolist(),
-                "antibodies": results[:, 3].tolist()
+                "time": _to_json_array(t),
+                "viral_load": _to_json_array(results[:, 0]),
+                "infected_cells": _to_json_array(results[:, 1]),
+                "t_cells": _to_json_array(results[:, 2]),
+                "antibodies": _to_json_array(results[:, 3])
             },
             "metrics": {
                 "peak_viral_load": float(metrics["peak_viral_load"]),
@@ -115,70 +157,160 @@ async def run_simulation_api(
             }
         }
         
-        return JSONResponse(content=response_data)
+        return ORJSONResponse(content=response_data)
     
     except Exception as e:
         logger.error(f"Simulation failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@app.post("/api/sweep")
+async def run_sweep_api(
+    overrides: List[Dict[str, float]],
+    duration: Optional[float] = None,
+    n_points: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run one simulation per parameter override set in a single batch."""
+    try:
+        if not overrides:
+            raise ValueError("At least one parameter set must be provided")
+        if len(overrides) > _MAX_SWEEP_RUNS:
+            raise ValueError(
+                f"Sweep of {len(overrides)} runs exceeds limit of {_MAX_SWEEP_RUNS}"
+            )
+
+        # Run all parameter sets in one batched integration
+        t_end = duration if duration is not None else config.SIMULATION_TIME["end"]
+        if duration is None and n_points is None:
+            t = _T_DEFAULT
+        else:
+            t = np.linspace(0, t_end, _resolve_points(n_points))
+        if len(overrides) * t.size > _MAX_SWEEP_VALUES:
+            raise ValueError(
+                f"Sweep of {len(overrides)} runs x {t.size} points exceeds "
+                f"limit of {_MAX_SWEEP_VALUES}"
+            )
+        batch = await asyncio.to_thread(
+            model.simulate_batch, t, _Y0_DEFAULT, overrides
+        )
+
+        runs = []
+        for override, results in zip(overrides, batch):
+            metrics = model.get_derived_quantities(t, results)
+            runs.append({
+                "parameters": override,
+                "stable": model.check_stability(results),
+                "data": {
+                    "viral_load": _to_json_array(results[:, 0]),
+                    "infected_cells": _to_json_array(results[:, 1]),
+                    "t_cells": _to_json_array(results[:, 2]),
+                    "antibodies": _to_json_array(results[:, 3])
+                },
+                "metrics": {
+                    "peak_viral_load": float(metrics["peak_viral_load"]),
+                    "clearance_time": float(metrics["clearance_time"]),
+                    "max_t_cells": float(metrics["max_t_cells"]),
+                    "peak_antibodies": float(metrics["peak_antibodies"])
+                }
+            })
+
+        return ORJSONResponse(content={
+            "success": True,
+            "time": _to_json_array(t),
+            "runs": runs
+        })
+
+    except Exception as e:
+        logger.error(f"Sweep failed: {str(e)}")
+        return ORJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 @app.get("/api/plot/{plot_type}")
-async def get_plot(plot_type: str):
+async def get_plot(plot_type: str, n_points: Optional[int] = None):
     """Generate and return a specific type of plot."""
     try:
-        # Create time points
-        t = np.linspace(0, config.SIMULATION_TIME["end"], config.SIMULATION_TIME["steps"])
-        
         # Run simulation
-        results = model.simulate(t, list(config.INITIAL_CONDITIONS.values()))
+        t, results = await asyncio.to_thread(
+            _run_sim, config.PARAMS, config.SIMULATION_TIME["end"],
+            _resolve_points(n_points)
+        )
         
         # Generate plot
-        fig = _generate_plot(plot_type, t, results)
-        plot_data = _fig_to_base64(fig)
+        plot_data = await asyncio.to_thread(_render_plot, plot_type, t, results)
         
-        return JSONResponse(content={"success": True, "plot": plot_data})
+        return ORJSONResponse(content={"success": True, "plot": plot_data})
     
     except Exception as e:
         logger.error(f"Plot generation failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 @app.get("/api/download-results")
-async def download_results():
+async def download_results(n_points: Optional[int] = None, full: bool = False):
     """Generate and return simulation results as a CSV file."""
     try:
-        # Create time points and run simulation
-        t = np.linspace(0, config.SIMULATION_TIME["end"], config.SIMULATION_TIME["steps"])
-        results = model.simulate(t, list(config.INITIAL_CONDITIONS.values()))
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Time': t,
-            'Viral_Load': results[:, 0],
-            'Infected_Cells': results[:, 1],
-            'T_Cells': results[:, 2],
-            'Antibodies': results[:, 3]
-        })
+        # Run simulation (full=true uses the complete simulation grid)
+        steps = config.SIMULATION_TIME["steps"] if full else _resolve_points(n_points)
+        t, results = await asyncio.to_thread(
+            _run_sim, config.PARAMS, config.SIMULATION_TIME["end"], steps
+        )
         
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-            df.to_csv(tmp.name, index=False)
-            return FileResponse(
-                tmp.name,
-                media_type='text/csv',
-                filename='simulation_results.csv'
-            )
+        # Stream rows directly to the client
+        return StreamingResponse(
+            _iter_csv_rows(t, results),
+            media_type='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=simulation_results.csv'}
+        )
     except Exception as e:
         logger.error(f"Download failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
+def _resolve_points(n_points: Optional[int]) -> int:
+    """Return the number of output time points, defaulting to the config value."""
+    if n_points is None:
+        return config.SIMULATION_TIME["output_points"]
+    if n_points < 2:
+        raise ValueError(f"n_points = {n_points} must be at least 2")
+    if n_points > _MAX_POINTS:
+        raise ValueError(f"n_points = {n_points} exceeds limit of {_MAX_POINTS}")
+    return n_points
+
+def _to_json_array(values: np.ndarray) -> np.ndarray:
+    """
+    Trim an array to 6 significant digits to shrink the JSON payload.
+
+    Values go through the same '%.6g' format as the CSV download, so small
+    populations keep their magnitude instead of rounding to zero. The
+    result is a contiguous 1D array that orjson serializes directly.
+    """
+    return np.char.mod('%.6g', values).astype(np.float64)
+
+def _iter_csv_rows(t: np.ndarray, results: np.ndarray,
+                   chunk_size: int = 256) -> Iterator[str]:
+    """Yield simulation results as CSV text, header first, in blocks of rows."""
+    yield "Time,Viral_Load,Infected_Cells,T_Cells,Antibodies\n"
+    data = np.column_stack([t, results])
+    for start in range(0, len(data), chunk_size):
+        buf = io.StringIO()
+        np.savetxt(buf, data[start:start + chunk_size], fmt='%.6g', delimiter=',')
+        yield buf.getvalue()
+
+def _render_plot(plot_type: str, t: np.ndarray, results: np.ndarray) -> str:
+    """Generate the requested plot and return it as a base64 PNG."""
+    # The plotter reuses its figures, so hold its lock until the PNG is encoded
+    with plotter.lock:
+        fig = _generate_plot(plot_type, t, results)
+        return _fig_to_base64(fig)
+
 def _generate_plot(plot_type: str, t: np.ndarray, results: np.ndarray):
     """Generate specified plot type."""
     if plot_type == "linear":
@@ -193,21 +325,21 @@ def _generate_plot(plot_type: str, t: np.ndarray, results: np.ndarray):
 def _fig_to_base64(fig) -> str:
     """Convert matplotlib figure to base64 string."""
     buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
+    fig.savefig(buf, format='png', **plotter.png_save_kwargs())
     buf.seek(0)
     return base64.b64encode(buf.getvalue()).decode('utf-8')
 
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={"success": False, "error": "Resource not found"}
     )
 
 @app.exception_handler(500)
 async def server_error_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"success": False, "error": "Internal server error"}
     )
\ No newline at end of file
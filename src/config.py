@@ -43,15 +43,24 @@ def get_default_simulation_time() -> Dict[str, Any]:
     return {
         "start": 0,      # Start time (days)
         "end": 30,       # Duration (days)
-        "steps": 1000    # Number of time points
+        "steps": 1000,   # Number of time points
+        "output_points": 200  # Default number of time points returned by the API
     }
 
 def get_default_plot_settings() -> Dict[str, Any]:
     """Plot configuration settings."""
     return {
-        "figsize": (10, 6),
-        "dpi": 300,
+        "figsize": (8, 5),
+        "screen_dpi": 100,  # Resolution of figures drawn for display
+        "print_dpi": 300,   # Resolution of saved raster files other than PNG
+        "fast": False,      # Draw at screen_dpi everywhere, without antialiasing
         "style": "default",
+        "max_points": 4000,  # Series longer than this are decimated before plotting
+        "use_numba": True,   # Use the compiled LTTB kernel when numba is installed
+        "save_dpi": 150,     # Resolution of saved PNG files
+        "png_compression": 3,  # zlib level for PNG output (faster than the default 6)
+        "thumbnail_dpi": 100,  # Resolution of the PNG written next to a PDF
+        "headless": False,   # Force the Agg backend for save-only use
         "colors": {
             "V": "#FF4B4B",  # Red for virus
             "I": "#4B4BFF",  # Blue for infected cells
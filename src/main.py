@@ -37,7 +37,7 @@ def run_simulation(
             config.SIMULATION_TIME["end"] = duration
         
         runner = SimulationRunner(config)
-        plotter = ViralSimulationPlotter()
+        plotter = ViralSimulationPlotter({**config.PLOT_SETTINGS, "headless": True})
         
         # Create output directory
         output_path = Path(output_dir)
@@ -65,7 +65,7 @@ def run_simulation(
                 logger.warning(f"Unknown plot type: {plot_type}")
                 continue
             
-            fig.savefig(plot_path)
+            fig.savefig(plot_path, **plotter.png_save_kwargs())
             logger.info(f"Saved {plot_type} plot to {plot_path}")
         
         logger.info("Simulation completed successfully")
@@ -1,22 +1,432 @@
 # models.py
 
+import math
+import logging
 import numpy as np
+from dataclasses import dataclass, asdict, astuple, fields
 from scipy.integrate import odeint
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Try to import numba, but fall back to plain Python if it's not available
+try:
+    import numba
+    from numba import njit, prange
+    HAS_NUMBA = True
+
+    # Batch kernels are launched from API worker threads; prefer OpenMP since
+    # TBB can hang at interpreter exit when started off the main thread
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+except ImportError:
+    logger.info("Numba not found, using pure Python right-hand side")
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# Ahead-of-time compiled RHS for the odeint fallback when numba is missing
+# (build with `cythonize -i src/_odes.pyx`)
+try:
+    from ._odes import rhs as _rhs_cython
+    HAS_CYTHON_RHS = True
+except ImportError:
+    HAS_CYTHON_RHS = False
+
+@dataclass(frozen=True)
+class ModelParameters:
+    """
+    Immutable, typed set of model parameters.
+    Field order defines the layout of the packed array used by the compiled RHS.
+    """
+    beta: float     # Infection rate (virion^-1 day^-1)
+    delta: float    # Infected cell death rate (day^-1)
+    p: float        # Viral production rate (virion cell^-1 day^-1)
+    c: float        # Viral clearance rate (day^-1)
+    k_t: float      # T cell killing rate
+    k_a: float      # Antibody neutralization rate
+    r: float        # T cell proliferation rate
+    theta: float    # Half-saturation constant
+    d_t: float      # T cell decay rate
+    d_a: float      # Antibody decay rate
+    tau: float      # Immune response delay
+    s_t: float      # T cell stimulation
+    s_a: float      # Antibody stimulation
+
+    def to_array(self) -> np.ndarray:
+        """Pack the parameters into a flat float64 array ordered as the fields."""
+        return np.array(astuple(self), dtype=np.float64)
+
+# Positional layout of the packed parameter array used by the compiled RHS
+PARAM_NAMES = tuple(f.name for f in fields(ModelParameters))
+
+def pack_params(params: Dict[str, float]) -> np.ndarray:
+    """
+    Pack a parameter dictionary into a flat float64 array ordered as PARAM_NAMES.
+    
+    Args:
+        params: Dictionary of model parameters
+        
+    Returns:
+        Array of parameter values indexed by position
+    """
+    return np.array([params[name] for name in PARAM_NAMES], dtype=np.float64)
+
+# Beyond this distance (days) from tau the activation sigmoid is 0 or 1 to
+# double precision, since exp(-3 * 13) ~ 1e-17
+_ACTIVATION_CUTOFF = 13.0
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def _immune_scaling(t, tau):
+    """
+    Smooth immune activation sigmoid, short-circuited when fully off or on.
+    
+    Args:
+        t: Current time point
+        tau: Immune response delay
+        
+    Returns:
+        Activation level between 0 and 1
+    """
+    if t < tau - _ACTIVATION_CUTOFF:
+        return 0.0
+    if t > tau + _ACTIVATION_CUTOFF:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-3.0 * (t - tau)))
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def _rhs(state, t, p):
+    """
+    Compiled right-hand side of the viral-immune ODE system.
+    
+    Args:
+        state: Current state vector [V, I, T, A]
+        t: Current time point
+        p: Packed parameter array (see PARAM_NAMES)
+        
+    Returns:
+        Array of derivatives [dV/dt, dI/dt, dT/dt, dA/dt]
+    """
+    V = state[0]
+    I = state[1]
+    T = state[2]
+    A = state[3]
+
+    beta, delta, prod, c = p[0], p[1], p[2], p[3]
+    k_t, k_a, r, theta = p[4], p[5], p[6], p[7]
+    d_t, d_a, tau, s_t, s_a = p[8], p[9], p[10], p[11], p[12]
+
+    # Calculate immune system activation (smooth transition)
+    immune_scaling = _immune_scaling(t, tau)
+
+    out = np.empty(4)
+
+    # Viral dynamics
+    out[0] = (prod * I                               # Viral production
+              - c * V                                # Natural clearance
+              - k_a * A * V                          # Antibody neutralization
+              - 0.005 * T * V)                       # Direct T cell effect
+
+    # Infected cell dynamics
+    out[1] = (beta * V * (1.0 - I / 1e3)             # Cell infection with carrying capacity
+              - delta * I                            # Natural cell death
+              - k_t * T * I)                         # T cell killing
+
+    # T cell dynamics
+    out[2] = (immune_scaling * r * T * I / (theta + I)   # Proliferation
+              + s_t * I * T / (100.0 + I)                # Additional stimulation
+              - d_t * T)                                 # Natural death
+
+    # Antibody dynamics
+    out[3] = (immune_scaling * s_a * V * T / (100.0 + V)  # Production
+              + immune_scaling * 0.1 * I                  # Additional stimulation from infected cells
+              - d_a * A)                                  # Natural decay
+
+    return out
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def _jac(state, t, p):
+    """
+    Analytic Jacobian of the viral-immune ODE system.
+    
+    Args:
+        state: Current state vector [V, I, T, A]
+        t: Current time point
+        p: Packed parameter array (see PARAM_NAMES)
+        
+    Returns:
+        4x4 array with entry [i, j] = d(dy_i/dt)/dy_j
+    """
+    V = state[0]
+    I = state[1]
+    T = state[2]
+    A = state[3]
+
+    beta, delta, prod, c = p[0], p[1], p[2], p[3]
+    k_t, k_a, r, theta = p[4], p[5], p[6], p[7]
+    d_t, d_a, tau, s_t, s_a = p[8], p[9], p[10], p[11], p[12]
+
+    immune_scaling = _immune_scaling(t, tau)
+
+    jac = np.zeros((4, 4))
+
+    # Viral dynamics
+    jac[0, 0] = -c - k_a * A - 0.005 * T
+    jac[0, 1] = prod
+    jac[0, 2] = -0.005 * V
+    jac[0, 3] = -k_a * V
+
+    # Infected cell dynamics
+    jac[1, 0] = beta * (1.0 - I / 1e3)
+    jac[1, 1] = -beta * V / 1e3 - delta - k_t * T
+    jac[1, 2] = -k_t * I
+
+    # T cell dynamics
+    jac[2, 1] = (immune_scaling * r * T * theta / ((theta + I) * (theta + I))
+                 + s_t * T * 100.0 / ((100.0 + I) * (100.0 + I)))
+    jac[2, 2] = (immune_scaling * r * I / (theta + I)
+                 + s_t * I / (100.0 + I)
+                 - d_t)
+
+    # Antibody dynamics
+    jac[3, 0] = immune_scaling * s_a * T * 100.0 / ((100.0 + V) * (100.0 + V))
+    jac[3, 1] = immune_scaling * 0.1
+    jac[3, 2] = immune_scaling * s_a * V / (100.0 + V)
+    jac[3, 3] = -d_a
+
+    return jac
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def _rk4_step(y, t, dt, p):
+    """
+    Advance the state by one classical fourth-order Runge-Kutta step.
+    
+    Args:
+        y: Current state vector [V, I, T, A]
+        t: Current time point
+        dt: Step size
+        p: Packed parameter array (see PARAM_NAMES)
+        
+    Returns:
+        State vector at t + dt
+    """
+    k1 = _rhs(y, t, p)
+    k2 = _rhs(y + 0.5 * dt * k1, t + 0.5 * dt, p)
+    k3 = _rhs(y + 0.5 * dt * k2, t + 0.5 * dt, p)
+    k4 = _rhs(y + dt * k3, t + dt, p)
+    return y + dt / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+@njit(cache=True, parallel=True, error_model="numpy")
+def _batch(ps, y0, ts, max_step):
+    """
+    Integrate one trajectory per parameter row in parallel with fixed-step RK4.
+    
+    Each output interval is split into equal RK4 steps no longer than
+    max_step, so accuracy does not depend on the output spacing. A run
+    that diverges is filled with NaN from that point on.
+    
+    Args:
+        ps: Packed parameter matrix with shape (n_runs, len(PARAM_NAMES))
+        y0: Initial state vector [V, I, T, A]
+        ts: Output time points
+        max_step: Largest RK4 step size
+        
+    Returns:
+        Array of results with shape (n_runs, len(ts), 4)
+    """
+    out = np.empty((ps.shape[0], ts.size, 4))
+    for i in prange(ps.shape[0]):
+        y = y0.copy()
+        out[i, 0] = y
+        for k in range(ts.size - 1):
+            substeps = max(1, int(math.ceil(abs(ts[k + 1] - ts[k]) / max_step)))
+            dt = (ts[k + 1] - ts[k]) / substeps
+            for j in range(substeps):
+                y = _rk4_step(y, ts[k] + j * dt, dt, ps[i])
+            finite = True
+            for m in range(y.size):
+                if not math.isfinite(y[m]):
+                    finite = False
+            if not finite:
+                out[i, k + 1:] = np.nan
+                break
+            out[i, k + 1] = y
+    return out
+
+# Maximum reasonable values for [V, I, T, A], used by check_stability
+_MAX_VALUES = np.array([
+    1e8,  # Maximum reasonable viral load
+    1e6,  # Maximum reasonable infected cells
+    1e5,  # Maximum reasonable T cells
+    1e4   # Maximum reasonable antibodies
+])
+
+# Dormand-Prince 5(4) Butcher tableau
+_DP_C = np.array([0.0, 1.0 / 5.0, 3.0 / 10.0, 4.0 / 5.0, 8.0 / 9.0, 1.0, 1.0])
+_DP_A = np.array([
+    [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [1.0 / 5.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [3.0 / 40.0, 9.0 / 40.0, 0.0, 0.0, 0.0, 0.0],
+    [44.0 / 45.0, -56.0 / 15.0, 32.0 / 9.0, 0.0, 0.0, 0.0],
+    [19372.0 / 6561.0, -25360.0 / 2187.0, 64448.0 / 6561.0, -212.0 / 729.0, 0.0, 0.0],
+    [9017.0 / 3168.0, -355.0 / 33.0, 46732.0 / 5247.0, 49.0 / 176.0, -5103.0 / 18656.0, 0.0],
+    [35.0 / 384.0, 0.0, 500.0 / 1113.0, 125.0 / 192.0, -2187.0 / 6784.0, 11.0 / 84.0],
+])
+# Difference between the 5th and embedded 4th order weights
+_DP_E = np.array([
+    71.0 / 57600.0, 0.0, -71.0 / 16695.0, 71.0 / 1920.0,
+    -17253.0 / 339200.0, 22.0 / 525.0, -1.0 / 40.0
+])
+# Dense output correction for the 4th order continuous extension
+_DP_D = np.array([
+    -12715105075.0 / 11282082432.0, 0.0, 87487479700.0 / 32700410799.0,
+    -10690763975.0 / 1880347072.0, 701980252875.0 / 199316789632.0,
+    -1453857185.0 / 822651844.0, 69997945.0 / 29380423.0
+])
+
+@njit(cache=True, error_model="numpy")
+def _dopri5(y0, ts, p, rtol, atol, max_steps):
+    """
+    Integrate the ODE system with an adaptive Dormand-Prince 5(4) method.
+    
+    Step sizes follow a PI controller on the embedded error estimate, and
+    values at the requested time points come from the method's dense output.
+    
+    Args:
+        y0: Initial state vector [V, I, T, A]
+        ts: Non-decreasing output time points, starting at the initial time
+        p: Packed parameter array (see PARAM_NAMES)
+        rtol: Relative tolerance
+        atol: Absolute tolerance
+        max_steps: Maximum number of internal steps
+        
+    Returns:
+        Column-major array of results with shape (len(ts), 4); a run that
+        diverges or needs more than max_steps steps is NaN from the first
+        output point it could not reach
+    """
+    # Stored per variable so each column of the returned transpose is contiguous
+    n = y0.size
+    out = np.empty((n, ts.size))
+    out[:, 0] = y0
+    if ts.size == 1:
+        return out.T
+    if ts[-1] == ts[0]:
+        # Zero-length span: every output point is the initial state
+        for i in range(1, ts.size):
+            out[:, i] = y0
+        return out.T
+
+    t = ts[0]
+    t_end = ts[-1]
+    y = y0.copy()
+    k = np.empty((7, n))
+    k[0] = _rhs(y, t, p)
+
+    # Initial step size guess (Hairer, Norsett & Wanner)
+    sc = atol + rtol * np.abs(y)
+    d0 = math.sqrt(np.mean((y / sc) ** 2))
+    d1 = math.sqrt(np.mean((k[0] / sc) ** 2))
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    f1 = _rhs(y + h0 * k[0], t + h0, p)
+    d2 = math.sqrt(np.mean(((f1 - k[0]) / sc) ** 2)) / h0
+    dmax = max(d1, d2)
+    h1 = max(1e-6, h0 * 1e-3) if dmax <= 1e-15 else (0.01 / dmax) ** 0.2
+    h = min(100.0 * h0, h1, t_end - t)
+
+    # PI step size controller constants
+    safe, beta = 0.9, 0.04
+    expo1 = 0.2 - 0.75 * beta
+    err_old = 1e-4
+
+    idx = 1
+    steps = 0
+    y_new = np.empty(n)
+    while idx < ts.size:
+        steps += 1
+        if steps > max_steps:
+            # Step sizes collapsed, as they do while the solution runs away
+            out[:, idx:] = np.nan
+            break
+        if t + h > t_end:
+            h = t_end - t
+
+        # Runge-Kutta stages (the last stage is evaluated at the new point)
+        for s in range(1, 7):
+            y_stage = y.copy()
+            for j in range(s):
+                y_stage += h * _DP_A[s, j] * k[j]
+            if s == 6:
+                y_new[:] = y_stage
+            k[s] = _rhs(y_stage, t + _DP_C[s] * h, p)
+
+        # Embedded error estimate
+        err_vec = np.zeros(n)
+        for j in range(7):
+            err_vec += h * _DP_E[j] * k[j]
+        sc = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = math.sqrt(np.mean((err_vec / sc) ** 2))
+        if not math.isfinite(err):
+            # The solution blew up; leave the remaining points as NaN
+            out[:, idx:] = np.nan
+            break
+
+        fac11 = err ** expo1 if err > 0.0 else 0.0
+        if err <= 1.0:
+            # Fill every requested output point inside the accepted step
+            t_new = t + h
+            if ts[idx] <= t_new:
+                r2 = y_new - y
+                r3 = h * k[0] - r2
+                r4 = r2 - h * k[6] - r3
+                r5 = np.zeros(n)
+                for j in range(7):
+                    r5 += h * _DP_D[j] * k[j]
+                while idx < ts.size and ts[idx] <= t_new:
+                    theta = (ts[idx] - t) / h
+                    theta1 = 1.0 - theta
+                    for m in range(n):
+                        out[m, idx] = y[m] + theta * (r2[m] + theta1 * (
+                            r3[m] + theta * (r4[m] + theta1 * r5[m])))
+                    idx += 1
+
+            t = t_new
+            y[:] = y_new
+            k[0] = k[6]   # First same as last
+
+            fac = fac11 / err_old ** beta
+            fac = max(0.1, min(5.0, fac / safe))
+            err_old = max(err, 1e-4)
+            h = h / fac
+        else:
+            h = h / min(5.0, fac11 / safe)
+
+    return out.T
 
 class ViralImmunityModel:
     """
     Viral infection and immune response model.
     Implements system of ODEs describing viral dynamics and immune response.
     """
-    def __init__(self, params: Dict[str, float]):
+    def __init__(self, params: Union[Dict[str, float], ModelParameters]):
         """
         Initialize model with parameters from config.
         
         Args:
-            params: Dictionary of model parameters
+            params: Dictionary of model parameters or a ModelParameters instance
         """
-        self.params = params
+        if isinstance(params, ModelParameters):
+            self.param_set = params
+            self.params = asdict(params)
+        else:
+            self.param_set = ModelParameters(**params)
+            self.params = params
+        self._p = self.param_set.to_array()
 
     def odes(self, state: List[float], t: float, params: Dict[str, float]) -> List[float]:
         """
@@ -30,33 +440,8 @@ class ViralImmunityModel:
         Returns:
             List of derivatives [dV/dt, dI/dt, dT/dt, dA/dt]
         """
-        V, I, T, A = state  # Unpack state variables
-
-        # Calculate immune system activation (smooth transition)
-        immune_scaling = 1 / (1 + np.exp(-3 * (t - params["tau"])))
-
-        # Viral dynamics
-        dVdt = (params["p"] * I                     # Viral production
-                - params["c"] * V                   # Natural clearance
-                - params["k_a"] * A * V             # Antibody neutralization
-                - 0.005 * T * V)                    # Direct T cell effect
-
-        # Infected cell dynamics
-        dIdt = (params["beta"] * V * (1 - I/1e3)   # Cell infection with carrying capacity
-                - params["delta"] * I               # Natural cell death
-                - params["k_t"] * T * I)            # T cell killing
-
-        # T cell dynamics
-        dTdt = (immune_scaling * params["r"] * T * I / (params["theta"] + I)  # Proliferation
-                + params["s_t"] * I * T / (100 + I)  # Additional stimulation
-                - params["d_t"] * T)                 # Natural death
-
-        # Antibody dynamics
-        dAdt = (immune_scaling * params["s_a"] * V * T / (100 + V)  # Production
-                + immune_scaling * 0.1 * I           # Additional stimulation from infected cells
-                - params["d_a"] * A)                 # Natural decay
-
-        return [dVdt, dIdt, dTdt, dAdt]
+        p = self._p if params is self.params else pack_params(params)
+        return _rhs(np.asarray(state, dtype=np.float64), t, p).tolist()
 
     def simulate(self, 
                 t: np.ndarray, 
@@ -69,24 +454,84 @@ class ViralImmunityModel:
             initial_conditions: Initial values for [V, I, T, A]
             
         Returns:
-            Array of simulation results with shape (len(t), 4)
+            Column-major array of simulation results with shape (len(t), 4),
+            so each variable results[:, i] is a contiguous 1D array
         """
         if initial_conditions is None:
             raise ValueError("Initial conditions must be provided")
 
-        # Run simulation
-        result = odeint(
-            func=self.odes,
-            y0=initial_conditions,
-            t=t,
-            args=(self.params,),
-            rtol=1e-6,       # Relative tolerance for solver
-            atol=1e-6,       # Absolute tolerance for solver
-            full_output=False
-        )
+        # Run simulation (compiled Dormand-Prince when numba is available;
+        # it only integrates forward, so other grids go to odeint)
+        t = np.asarray(t, dtype=np.float64)
+        if HAS_NUMBA and (np.diff(t) >= 0.0).all():
+            result = _dopri5(
+                np.asarray(initial_conditions, dtype=np.float64),
+                t,
+                self._p,
+                1e-6,        # Relative tolerance for solver
+                1e-6,        # Absolute tolerance for solver
+                100000       # Maximum number of internal steps
+            )
+        else:
+            result = odeint(
+                func=_rhs_cython if HAS_CYTHON_RHS else _rhs,
+                y0=initial_conditions,
+                t=t,
+                args=(self._p,),
+                Dfun=_jac,       # Analytic Jacobian
+                col_deriv=False, # Jacobian rows are equations
+                rtol=1e-6,       # Relative tolerance for solver
+                atol=1e-6,       # Absolute tolerance for solver
+                mxstep=5000,     # Allow enough internal steps for stiff transients
+                full_output=False
+            )
+
+        # Keep each variable contiguous so column passes stream through memory
+        result = np.asfortranarray(result)
+
+        # Ensure non-negative values, in place on the solver's output buffer
+        np.clip(result, 0.0, None, out=result)
+        return result
+
+    def simulate_batch(self,
+                       t: np.ndarray,
+                       initial_conditions: List[float],
+                       overrides: List[Dict[str, float]],
+                       max_step: float = 0.05) -> np.ndarray:
+        """
+        Simulate many parameter variants of the model in parallel.
+        
+        Each entry of overrides is merged onto the model parameters to give
+        one run. Runs are integrated with fixed-step RK4 rather than odeint.
+        A run that diverges is returned as NaN from the point it blew up,
+        without failing the other runs.
+        
+        Args:
+            t: Array of time points to simulate
+            initial_conditions: Initial values for [V, I, T, A]
+            overrides: Parameter overrides, one dictionary per run
+            max_step: Largest RK4 step size (days)
+            
+        Returns:
+            Array of simulation results with shape (len(overrides), len(t), 4)
+        """
+        for override in overrides:
+            unknown = set(override) - set(PARAM_NAMES)
+            if unknown:
+                raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+
+        ps = np.array(
+            [pack_params({**self.params, **override}) for override in overrides],
+            dtype=np.float64
+        ).reshape(len(overrides), len(PARAM_NAMES))
+        y0 = np.asarray(initial_conditions, dtype=np.float64)
+        ts = np.asarray(t, dtype=np.float64)
+
+        results = _batch(ps, y0, ts, max_step)
 
-        # Ensure non-negative values
-        return np.maximum(result, 0)
+        # Ensure non-negative values, in place on the kernel's output buffer
+        np.clip(results, 0.0, None, out=results)
+        return results
 
     def get_derived_quantities(self, 
                              t: np.ndarray, 
@@ -105,21 +550,22 @@ class ViralImmunityModel:
         T = results[:, 2]  # T cells
         A = results[:, 3]  # Antibodies
 
-        # Calculate key metrics
-        peak_viral_load = np.max(V)
-        peak_viral_time = t[np.argmax(V)]
+        # Calculate key metrics (single pass over V for both peak and its time)
+        peak_idx = int(V.argmax())
+        peak_viral_load = V[peak_idx]
+        peak_viral_time = t[peak_idx]
         
         # Find clearance time (when viral load drops below 1% of peak)
         threshold = peak_viral_load * 0.01
-        clearance_idx = np.where(V < threshold)[0]
-        clearance_time = t[clearance_idx[0]] if len(clearance_idx) > 0 else np.inf
+        below = V < threshold
+        clearance_time = t[below.argmax()] if below.any() else np.inf
 
         return {
             "peak_viral_load": peak_viral_load,
             "peak_viral_time": peak_viral_time,
             "clearance_time": clearance_time,
-            "max_t_cells": np.max(T),
-            "peak_antibodies": np.max(A)
+            "max_t_cells": T.max(),
+            "peak_antibodies": A.max()
         }
 
     def check_stability(self, results: np.ndarray) -> bool:
@@ -132,20 +578,6 @@ class ViralImmunityModel:
         Returns:
             True if results are stable, False otherwise
         """
-        # Check for infinities or NaN
-        if np.any(~np.isfinite(results)):
-            return False
-
-        # Check for unrealistic values
-        max_values = {
-            "V": 1e8,  # Maximum reasonable viral load
-            "I": 1e6,  # Maximum reasonable infected cells
-            "T": 1e5,  # Maximum reasonable T cells
-            "A": 1e4   # Maximum reasonable antibodies
-        }
-
-        for i, max_val in enumerate(max_values.values()):
-            if np.any(results[:, i] > max_val):
-                return False
-
-        return True
\ No newline at end of file
+        # Check for infinities/NaN, then unrealistic values against the bounds
+        # broadcast across all columns at once
+        return bool(np.isfinite(results).all() and not (results > _MAX_VALUES).any())
\ No newline at end of file
@@ -1,33 +1,130 @@
 # visualization.py
 
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
-from typing import Tuple, Dict, Any, Optional
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.ticker import FuncFormatter, Locator, MaxNLocator
+from typing import Tuple, Dict, Any, List, Optional, Set
 from pathlib import Path
 import logging
+import threading
+from functools import cached_property
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Try to import seaborn, but don't fail if it's not available
-try:
-    import seaborn as sns
-    HAS_SEABORN = True
-except ImportError:
-    logger.info("Seaborn not found, using default matplotlib style")
-    HAS_SEABORN = False
+# Legend labels, in state order (V, I, T, A)
+_LABELS = ("Viral Load (V)", "Infected Cells (I)",
+           "CD8+ T Cells (T)", "Antibodies (A)")
+_PHASE_LABELS = ("V vs T cells", "V vs Antibodies")
+
+# rcParams used while drawing with the default style
+_RC = {
+    'axes.grid': True,
+    'grid.alpha': 0.3,
+    'axes.labelsize': 12,
+    'xtick.labelsize': 10,
+    'ytick.labelsize': 10,
+    'axes.titlesize': 14
+}
+
+def _log_ticks(vmin: float, vmax: float, subs: Tuple[float, ...]) -> np.ndarray:
+    """Log10 of every sub * 10**n that falls inside [vmin, vmax]."""
+    decades = np.arange(np.floor(vmin), np.ceil(vmax) + 1)
+    ticks = (decades[:, np.newaxis] + np.log10(subs)).ravel()
+    return ticks[(ticks >= vmin) & (ticks <= vmax)]
+
+class _Log10Locator(Locator):
+    """
+    Ticks for an axis that holds log10 values, placed as on a log axis.
+    
+    Major ticks fall on whole decades, or on 1-2-5 multiples when the view
+    spans too few decades, and on evenly spaced values for narrower views.
+    Minor ticks mark the 2..9 multiples between adjacent decade ticks.
+    """
+
+    def __init__(self, minor: bool = False):
+        self.minor = minor
+
+    def __call__(self):
+        return self.tick_values(*self.axis.get_view_interval())
+
+    def tick_values(self, vmin, vmax):
+        vmin, vmax = sorted((vmin, vmax))
+        if not (np.isfinite(vmin) and np.isfinite(vmax)):
+            return []
+        if len(_log_ticks(vmin, vmax, (1.0,))) >= 3:
+            ticks = MaxNLocator(integer=True).tick_values(vmin, vmax)
+            ticks = ticks[(ticks >= vmin) & (ticks <= vmax)]
+            if not self.minor:
+                return ticks
+            # Sub-decade marks only read as log ticks between adjacent decades
+            if len(ticks) > 1 and ticks[1] - ticks[0] > 1:
+                return []
+            return _log_ticks(vmin, vmax, tuple(range(2, 10)))
+        if self.minor:
+            return []
+        ticks = _log_ticks(vmin, vmax, (1.0, 2.0, 5.0))
+        if len(ticks) >= 3:
+            return ticks
+        values = MaxNLocator(nbins=5, steps=[1, 2, 2.5, 5, 10]).tick_values(10.0 ** vmin, 10.0 ** vmax)
+        values = values[values > 0]
+        ticks = np.log10(values)
+        return ticks[(ticks >= vmin) & (ticks <= vmax)]
+
+def _format_log10(v: float, pos=None) -> str:
+    """Label a log10 tick position with the value it stands for."""
+    exponent = int(np.floor(v + 1e-9))
+    mantissa = 10.0 ** (v - exponent)
+    if abs(mantissa - 1.0) < 1e-6:
+        return f"$10^{{{exponent}}}$"
+    return f"${mantissa:.3g}\\times10^{{{exponent}}}$"
+
+# Tick labels for axes that hold log10 values
+_DECADE_FORMATTER = FuncFormatter(_format_log10)
+
+# Output formats saved as vectors, without rasterizing at a dpi
+_VECTOR_FORMATS = {".pdf", ".svg"}
 
 class ViralSimulationPlotter:
     """
     Handles visualization of viral infection and immune response simulation results.
+
+    Each plot type draws into one Figure that is kept and cleared between
+    calls, so a returned Figure is only valid until the next call for the
+    same plot type. Callers sharing a plotter across threads should hold
+    ``lock`` until they are done with the returned Figure.
+
+    Results are taken with shape (N, 4), one column per state variable, and
+    handled in column-major (Fortran) order so each series is contiguous in
+    memory. ViralImmunityModel.simulate already returns that layout; other
+    input is converted once on entry.
+
+    For save-only use (scripts, CI, the API server) set settings["headless"]
+    to select the Agg backend before the first figure is made, which skips
+    probing for GUI backends. Setting MPLBACKEND=Agg in the environment has
+    the same effect without code changes.
     """
+    # Output directories already created by any plotter in this process
+    _mkdir_cache: Set[str] = set()
+
     def __init__(self, settings: Optional[Dict[str, Any]] = None):
         """Initialize plotter with visualization settings."""
         self.settings = settings or {
-            "figsize": (10, 6),
-            "dpi": 300,
+            "figsize": (8, 5),
+            "screen_dpi": 100,  # Resolution of figures drawn for display
+            "print_dpi": 300,   # Resolution of saved raster files other than PNG
+            "fast": False,      # Draw at screen_dpi everywhere, without antialiasing
             "style": "default",
+            "max_points": 4000,  # Series longer than this are decimated before plotting
+            "use_numba": True,   # Use the compiled LTTB kernel when numba is installed
+            "save_dpi": 150,     # Resolution of saved PNG files
+            "png_compression": 3,  # zlib level for PNG output (faster than the default 6)
+            "thumbnail_dpi": 100,  # Resolution of the PNG written next to a PDF
+            "headless": False,   # Force the Agg backend for save-only use
             "colors": {
                 "V": "#FF4B4B",  # Red for virus
                 "I": "#4B4BFF",  # Blue for infected cells
@@ -35,120 +132,362 @@ class ViralSimulationPlotter:
                 "A": "#FF4BFF"   # Purple for antibodies
             }
         }
+
+        # Reusable figures keyed by plot type, and the lock guarding them
+        self._figures: Dict[str, Tuple[Figure, plt.Axes]] = {}
+        # Series lines of the cached "linear" and "log" figures, for update_results
+        self._lines: Dict[str, List[Line2D]] = {}
+        self.lock = threading.RLock()
         
-        # Set style
-        if HAS_SEABORN and self.settings["style"] == "seaborn":
-            plt.style.use("seaborn")
+        # Style applied while drawing, without touching global rcParams
+        if self.settings["style"] == "seaborn":
+            self._rc = plt.style.library["seaborn-v0_8"]
         else:
-            plt.style.use("default")
-            plt.rcParams.update({
-                'axes.grid': True,
-                'grid.alpha': 0.3,
-                'axes.labelsize': 12,
-                'xtick.labelsize': 10,
-                'ytick.labelsize': 10,
-                'axes.titlesize': 14
-            })
-
-    def create_figure(self) -> Tuple[Figure, plt.Axes]:
-        """Create and configure a new figure."""
-        fig, ax = plt.subplots(figsize=self.settings["figsize"], dpi=self.settings["dpi"])
-        return fig, ax
+            self._rc = _RC
+        self._screen_dpi = self.settings.get("screen_dpi", 100)
+        self._backend_set = False
+        if self.settings.get("fast"):
+            self._rc = {**self._rc, "lines.antialiased": False}
+
+    @cached_property
+    def _color_list(self) -> Tuple[str, ...]:
+        """Series colors in state order, built once from settings["colors"]."""
+        return tuple(self.settings["colors"][k] for k in ("V", "I", "T", "A"))
+
+    def create_figure(self, key: Optional[str] = None) -> Tuple[Figure, plt.Axes]:
+        """
+        Create and configure a figure.
+
+        Without a key a new figure is created. With a key the figure cached
+        under it is reused, with its axes cleared. Figures use constrained
+        layout, so they are saved without bbox_inches="tight".
+        """
+        if self.settings.get("headless") and not self._backend_set:
+            # A no-op when Agg is already selected
+            matplotlib.use("Agg", force=True)
+            self._backend_set = True
+
+        with plt.rc_context(self._rc):
+            if key is None:
+                return plt.subplots(figsize=self.settings["figsize"], dpi=self._screen_dpi,
+                                    layout="constrained")
+
+            if key not in self._figures:
+                self._figures[key] = plt.subplots(
+                    figsize=self.settings["figsize"], dpi=self._screen_dpi,
+                    layout="constrained"
+                )
+            fig, ax = self._figures[key]
+            ax.clear()
+            # Cleared axes detach their lines, so update_results must redraw
+            self._lines.pop(key, None)
+            return fig, ax
+
+    def close(self) -> None:
+        """Close and forget all cached figures."""
+        with self.lock:
+            for fig, _ in self._figures.values():
+                plt.close(fig)
+            self._figures.clear()
+            self._lines.clear()
 
     def plot_results(self, t: np.ndarray, results: np.ndarray, 
                     save_path: Optional[str] = None) -> Figure:
         """Create linear scale plot of simulation results."""
-        fig, ax = self.create_figure()
-        
-        labels = ["Viral Load (V)", "Infected Cells (I)", 
-                 "CD8+ T Cells (T)", "Antibodies (A)"]
-        colors = list(self.settings["colors"].values())
-        
-        for idx, (label, color) in enumerate(zip(labels, colors)):
-            ax.plot(t, results[:, idx], label=label, color=color, linewidth=2)
-        
-        ax.set_xlabel("Time (days)")
-        ax.set_ylabel("Population")
-        ax.set_title("Viral Infection & Immune Response Dynamics")
-        ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
-        ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        if save_path:
-            self._save_figure(fig, save_path)
+        with self.lock, plt.rc_context(self._rc):
+            fig, ax = self.create_figure("linear")
+            results = self._as_columns(results)
             
-        return fig
+            t, results = self._downsample(t, results)
+
+            # Draw all four series in one call, colored by the property cycle
+            ax.set_prop_cycle(color=self._color_list)
+            lines = ax.plot(t, results, linewidth=2)
+            self._lines["linear"] = lines
+            
+            ax.set_xlabel("Time (days)")
+            ax.set_ylabel("Population")
+            ax.set_title("Viral Infection & Immune Response Dynamics")
+            ax.legend(lines, _LABELS, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.grid(True, alpha=0.3)
+            
+            if save_path:
+                self._save_figure(fig, save_path)
+            
+            return fig
 
     def plot_log_scale(self, t: np.ndarray, results: np.ndarray,
                       save_path: Optional[str] = None) -> Figure:
         """Create logarithmic scale plot of simulation results."""
-        fig, ax = self.create_figure()
-        
-        labels = ["Viral Load (V)", "Infected Cells (I)", 
-                 "CD8+ T Cells (T)", "Antibodies (A)"]
-        colors = list(self.settings["colors"].values())
-        
-        for idx, (label, color) in enumerate(zip(labels, colors)):
-            # Add small constant to avoid log(0)
-            data = results[:, idx] + 1e-10
-            ax.semilogy(t, data, label=label, color=color, linewidth=2)
-        
-        ax.set_xlabel("Time (days)")
-        ax.set_ylabel("Population (log scale)")
-        ax.set_title("Viral Infection & Immune Response Dynamics (Log Scale)")
-        ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
-        ax.grid(True, alpha=0.3, which="both")
-        
-        plt.tight_layout()
-        
-        if save_path:
-            self._save_figure(fig, save_path)
+        with self.lock, plt.rc_context(self._rc):
+            fig, ax = self.create_figure("log")
+            results = self._as_columns(results)
+            
+            t, data = self._downsample(t, results, log=True)
+
+            # Floor at a small constant to avoid log(0), once for all series.
+            # A downsampled array is already a copy, so clamp it in place.
+            data = np.maximum(data, 1e-10, out=None if data is results else data)
+            ax.set_prop_cycle(color=self._color_list)
+            lines = ax.semilogy(t, data, linewidth=2)
+            self._lines["log"] = lines
             
-        return fig
+            ax.set_xlabel("Time (days)")
+            ax.set_ylabel("Population (log scale)")
+            ax.set_title("Viral Infection & Immune Response Dynamics (Log Scale)")
+            ax.legend(lines, _LABELS, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.grid(True, alpha=0.3, which="both")
+            
+            if save_path:
+                self._save_figure(fig, save_path)
+            
+            return fig
 
     def plot_phase_space(self, results: np.ndarray,
                         save_path: Optional[str] = None) -> Figure:
         """Create phase space plot of viral load vs immune responses."""
-        fig, ax = self.create_figure()
-        
-        # Plot viral load vs T cells
-        ax.plot(results[:, 0], results[:, 2], 
-                label="V vs T cells", color=self.settings["colors"]["T"],
-                linewidth=2)
-        
-        # Plot viral load vs Antibodies
-        ax.plot(results[:, 0], results[:, 3], 
-                label="V vs Antibodies", color=self.settings["colors"]["A"],
-                linewidth=2)
-        
-        # Add small constant and set log scales
-        ax.set_xscale("log")
-        ax.set_yscale("log")
-        
-        # Customize plot
-        ax.set_xlabel("Viral Load (V)")
-        ax.set_ylabel("Immune Response")
-        ax.set_title("Phase Space Analysis")
-        ax.legend(loc="best")
-        ax.grid(True, alpha=0.3, which="both")
-        
-        plt.tight_layout()
-        
-        if save_path:
-            self._save_figure(fig, save_path)
+        with self.lock, plt.rc_context(self._rc):
+            fig, ax = self.create_figure("phase")
+            results = self._as_columns(results)
+            
+            # Take log10 once and draw on linear axes labelled in decades,
+            # so repeated draws skip the log transform. Non-positive values
+            # are masked, as log axes would leave them out of autoscaling.
+            cols = results[:, [0, 2, 3]].T
+            logs = np.full_like(cols, np.nan)
+            np.log10(cols, out=logs, where=cols > 0)
+            log_v, log_t, log_a = logs
+
+            # Draw both trajectories as one collection
+            colors = (self.settings["colors"]["T"], self.settings["colors"]["A"])
+            segments = [np.column_stack([log_v, log_t]), np.column_stack([log_v, log_a])]
+            ax.add_collection(LineCollection(segments, colors=colors, linewidths=2))
+            ax.autoscale_view()
+            
+            for axis in (ax.xaxis, ax.yaxis):
+                axis.set_major_locator(_Log10Locator())
+                axis.set_minor_locator(_Log10Locator(minor=True))
+                axis.set_major_formatter(_DECADE_FORMATTER)
             
-        return fig
+            # Customize plot
+            ax.set_xlabel("Viral Load (V)")
+            ax.set_ylabel("Immune Response")
+            ax.set_title("Phase Space Analysis")
+            handles = [Line2D([], [], color=c, linewidth=2) for c in colors]
+            # "best" placement ignores collections, so keep it outside
+            ax.legend(handles, _PHASE_LABELS, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.grid(True, alpha=0.3, which="both")
+            
+            if save_path:
+                self._save_figure(fig, save_path)
+            
+            return fig
+
+    def plot_ensemble(self, t: np.ndarray, results_stack: np.ndarray,
+                      save_path: Optional[str] = None) -> Figure:
+        """
+        Plot many simulation runs on one linear scale figure.
+
+        Each state variable is drawn as a single LineCollection holding
+        one translucent line per run, so the cost of building the figure
+        does not grow with the number of runs. Runs longer than
+        settings["max_points"] are decimated by stride.
+
+        Args:
+            t: Time points array with shape (N,)
+            results_stack: Results of R runs with shape (R, N, 4), as
+                returned by ViralImmunityModel.simulate_batch
+            save_path: Optional path to save the figure to
+
+        Returns:
+            The ensemble Figure
+        """
+        results_stack = np.asarray(results_stack, dtype=np.float64)
+        if results_stack.ndim != 3 or results_stack.shape[1:] != (len(t), 4):
+            raise ValueError(
+                f"Expected results of shape (runs, {len(t)}, 4), got {results_stack.shape}"
+            )
+
+        with self.lock, plt.rc_context(self._rc):
+            fig, ax = self.create_figure("ensemble")
+
+            max_points = self.settings.get("max_points")
+            if max_points and len(t) > max_points:
+                idx = _stride_indices(len(t), max_points)
+                t, results_stack = t[idx], results_stack[:, idx]
+
+            # One (runs, N, 2) segment array per state variable; the
+            # collection keeps a view of it, so each needs its own buffer
+            for col, color in enumerate(self._color_list):
+                segments = np.empty(results_stack.shape[:2] + (2,))
+                segments[:, :, 0] = t
+                segments[:, :, 1] = results_stack[:, :, col]
+                ax.add_collection(
+                    LineCollection(segments, colors=color, linewidths=1, alpha=0.3)
+                )
+            ax.autoscale_view()
+
+            ax.set_xlabel("Time (days)")
+            ax.set_ylabel("Population")
+            ax.set_title(f"Viral Infection & Immune Response Dynamics ({len(results_stack)} runs)")
+            handles = [Line2D([], [], color=c, linewidth=2) for c in self._color_list]
+            ax.legend(handles, _LABELS, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.grid(True, alpha=0.3)
+
+            if save_path:
+                self._save_figure(fig, save_path)
+
+            return fig
+
+    def update_results(self, t: np.ndarray, results: np.ndarray,
+                       plot_type: str = "linear") -> Figure:
+        """
+        Redraw a linear or log plot with new results, reusing its lines.
+
+        Only the data of the existing Line2D artists is replaced, which is
+        much cheaper than rebuilding the plot on every frame of a sweep or
+        animation. If the plot has not been drawn yet it is created. The
+        figure is not rendered here; interactive callers should follow with
+        ``fig.canvas.draw_idle()``.
+
+        Args:
+            t: Time points array
+            results: Simulation results with shape (N, 4)
+            plot_type: "linear" or "log"
+
+        Returns:
+            The updated Figure
+        """
+        if plot_type not in ("linear", "log"):
+            raise ValueError(f"Cannot update plot type: {plot_type}")
+
+        with self.lock:
+            lines = self._lines.get(plot_type)
+            if lines is None:
+                plot = self.plot_results if plot_type == "linear" else self.plot_log_scale
+                return plot(t, results)
+
+            results = self._as_columns(results)
+            t, data = self._downsample(t, results, log=plot_type == "log")
+            if plot_type == "log":
+                data = np.maximum(data, 1e-10, out=None if data is results else data)
+
+            # LTTB downsampling gives one time column per series
+            t_cols = t.T if t.ndim == 2 else (t,) * len(lines)
+            for line, t_col, col in zip(lines, t_cols, data.T):
+                line.set_data(t_col, col)
+
+            fig, ax = self._figures[plot_type]
+            ax.relim()
+            ax.autoscale_view()
+            return fig
+
+    @staticmethod
+    def _as_columns(results: np.ndarray) -> np.ndarray:
+        """Return results as column-major float64, copying only if needed."""
+        return np.asfortranarray(results, dtype=np.float64)
+
+    def _downsample(self, t: np.ndarray, results: np.ndarray,
+                    log: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reduce long series to at most settings["max_points"] rows.
+
+        With settings["use_numba"] and numba installed, each column is
+        downsampled with the compiled LTTB kernel, so the returned time
+        array is 2D with one column per series. Log-scale plots pick points
+        on log-transformed values. Otherwise every n-th row is taken,
+        always keeping the final point.
+        """
+        max_points = self.settings.get("max_points")
+        if not max_points or len(t) <= max_points:
+            return t, results
+
+        if self.settings.get("use_numba") and max_points >= 3:
+            try:
+                from ._viz_kernels import lttb_indices
+            except ImportError:
+                logger.info("Numba not found, using stride decimation")
+            else:
+                if log:
+                    values = np.maximum(results, 1e-10)
+                    np.log10(values, out=values)
+                else:
+                    values = results
+                idx = lttb_indices(
+                    np.ascontiguousarray(t, dtype=np.float64),
+                    self._as_columns(values),
+                    max_points
+                )
+                return t[idx], self._as_columns(np.take_along_axis(results, idx, axis=0))
+
+        idx = _stride_indices(len(t), max_points)
+        return t[idx], self._as_columns(results[idx])
+
+    def png_save_kwargs(self) -> Dict[str, Any]:
+        """
+        savefig keyword arguments for screen-resolution PNG output.
+
+        Uses settings["save_dpi"] (screen_dpi with settings["fast"]) and a
+        low zlib compression level (settings["png_compression"]), which
+        encodes much faster than the default at a small cost in file size.
+        """
+        return {
+            "dpi": self._raster_dpi("save_dpi", 150),
+            "pil_kwargs": {
+                "compress_level": self.settings.get("png_compression", 3),
+                "optimize": False
+            }
+        }
+
+    def _raster_dpi(self, key: str, default: int) -> int:
+        """Resolution for raster output, or screen_dpi in fast mode."""
+        if self.settings.get("fast"):
+            return self._screen_dpi
+        return self.settings.get(key, default)
 
     def _save_figure(self, fig: Figure, save_path: str) -> None:
-        """Save figure to specified path."""
+        """
+        Save figure to specified path.
+
+        PDF and SVG are written as vector output with no rasterization.
+        A path without a suffix is treated as a stem and written twice: a
+        .pdf for archiving and a .png thumbnail at settings["thumbnail_dpi"].
+        """
         try:
-            Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-            fig.savefig(save_path, dpi=self.settings["dpi"], bbox_inches="tight")
+            path = Path(save_path)
+            parent = str(path.parent)
+            if parent not in self._mkdir_cache:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._mkdir_cache.add(parent)
+            suffix = path.suffix.lower()
+            if not suffix:
+                self._save_vector(fig, path.with_suffix(".pdf"))
+                png_kwargs = self.png_save_kwargs()
+                png_kwargs["dpi"] = self.settings.get("thumbnail_dpi", 100)
+                fig.savefig(path.with_suffix(".png"), **png_kwargs)
+            elif suffix in _VECTOR_FORMATS:
+                self._save_vector(fig, path)
+            elif suffix == ".png":
+                fig.savefig(save_path, **self.png_save_kwargs())
+            else:
+                fig.savefig(save_path, dpi=self._raster_dpi("print_dpi", 300))
             logger.info(f"Figure saved to {save_path}")
         except Exception as e:
             logger.error(f"Failed to save figure: {str(e)}")
 
+    @staticmethod
+    def _save_vector(fig: Figure, path: Path) -> None:
+        """Write a figure as vector PDF or SVG."""
+        fig.savefig(path, metadata={"Creator": "viral-immunity-model"})
+
+def _stride_indices(n: int, max_points: int) -> np.ndarray:
+    """Every k-th index of n, at most max_points of them, ending at n - 1."""
+    stride = -(-n // max_points)
+    idx = np.arange(0, n, stride)
+    if idx[-1] != n - 1:
+        idx[-1] = n - 1
+    return idx
+
 # Convenience functions for direct use
 def plot_results(t: np.ndarray, results: np.ndarray, 
                 settings: Optional[Dict[str, Any]] = None,
@@ -169,4 +508,11 @@ def plot_phase_space(results: np.ndarray,
                     save_path: Optional[str] = None) -> Figure:
     """Convenience function to plot phase space analysis."""
     plotter = ViralSimulationPlotter(settings)
-    return plotter.plot_phase_space(results, save_path)
\ No newline at end of file
+    return plotter.plot_phase_space(results, save_path)
+
+def plot_ensemble(t: np.ndarray, results_stack: np.ndarray,
+                  settings: Optional[Dict[str, Any]] = None,
+                  save_path: Optional[str] = None) -> Figure:
+    """Convenience function to plot many runs on one figure."""
+    plotter = ViralSimulationPlotter(settings)
+    return plotter.plot_ensemble(t, results_stack, save_path)
\ No newline at end of file
@@ -0,0 +1,36 @@
+# test_api.py
+
+import unittest
+
+from fastapi.testclient import TestClient
+
+from src import api
+
+class SweepApiTest(unittest.TestCase):
+    """Checks for the POST /api/sweep endpoint."""
+
+    def setUp(self):
+        self.client = TestClient(api.app)
+
+    def test_short_grid_sweep(self):
+        response = self.client.post("/api/sweep?n_points=10", json=[{}, {"c": 10.0}])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body["time"]), 10)
+        self.assertEqual([run["stable"] for run in body["runs"]], [True, True])
+
+    def test_diverging_run_is_reported_unstable(self):
+        response = self.client.post("/api/sweep", json=[{"delta": -10.0}, {}])
+        self.assertEqual(response.status_code, 200)
+        runs = response.json()["runs"]
+        self.assertFalse(runs[0]["stable"])
+        self.assertTrue(runs[1]["stable"])
+
+    def test_rejects_oversized_sweep(self):
+        overrides = [{}] * api._MAX_SWEEP_RUNS
+        response = self.client.post(f"/api/sweep?n_points={api._MAX_POINTS}", json=overrides)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.json()["success"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# test_models.py
+
+import unittest
+
+import numpy as np
+from scipy.integrate import odeint
+
+from src.config import ModelConfig
+from src.models import HAS_NUMBA, ViralImmunityModel, _dopri5, _immune_scaling, _rhs
+
+class DormandPrinceTest(unittest.TestCase):
+    """Regression checks for the compiled Dormand-Prince solver."""
+
+    def setUp(self):
+        config = ModelConfig()
+        self.model = ViralImmunityModel(config.PARAMS)
+        self.y0 = np.array(list(config.INITIAL_CONDITIONS.values()), dtype=np.float64)
+        self.t = np.linspace(0, config.SIMULATION_TIME["end"], config.SIMULATION_TIME["steps"])
+
+    def test_matches_odeint_on_default_grid(self):
+        reference = odeint(_rhs, self.y0, self.t, args=(self.model._p,),
+                           rtol=1e-10, atol=1e-10)
+        result = _dopri5(self.y0, self.t, self.model._p, 1e-6, 1e-6, 100000)
+        np.testing.assert_allclose(result, reference, rtol=1e-4, atol=1e-4)
+
+    def test_zero_span_returns_initial_state(self):
+        t = np.zeros(5)
+        result = _dopri5(self.y0, t, self.model._p, 1e-6, 1e-6, 100000)
+        np.testing.assert_array_equal(result, np.tile(self.y0, (5, 1)))
+
+    def test_single_point_returns_initial_state(self):
+        result = _dopri5(self.y0, np.array([0.0]), self.model._p, 1e-6, 1e-6, 100000)
+        np.testing.assert_array_equal(result, self.y0[np.newaxis, :])
+
+    def test_diverging_run_is_flagged_unstable(self):
+        for override in ({"beta": 1000.0}, {"delta": -10.0}, {"k_a": -1.0}):
+            model = ViralImmunityModel({**ModelConfig().PARAMS, **override})
+            result = model.simulate(self.t, self.y0)
+            self.assertEqual(result.shape, (self.t.size, 4))
+            self.assertFalse(model.check_stability(result), override)
+
+    def test_simulate_accepts_decreasing_grid(self):
+        t = np.linspace(0, -1, 11)
+        result = self.model.simulate(t, self.y0)
+        self.assertEqual(result.shape, (11, 4))
+        self.assertTrue(np.isfinite(result).all())
+
+    @unittest.skipUnless(HAS_NUMBA, "numba not installed")
+    def test_simulate_uses_compiled_solver_on_default_grid(self):
+        np.testing.assert_array_equal(
+            self.model.simulate(self.t, self.y0),
+            np.clip(_dopri5(self.y0, self.t, self.model._p, 1e-6, 1e-6, 100000), 0.0, None)
+        )
+
+class SimulateBatchTest(unittest.TestCase):
+    """Checks for the batched fixed-step RK4 parameter sweep."""
+
+    def setUp(self):
+        self.config = ModelConfig()
+        self.model = ViralImmunityModel(self.config.PARAMS)
+        self.y0 = list(self.config.INITIAL_CONDITIONS.values())
+
+    def test_matches_simulate_across_grids(self):
+        overrides = [{}, {"beta": 2e-5}, {"k_a": 0.004}]
+        for n_points in (2, 10, 200, 1000):
+            t = np.linspace(0, self.config.SIMULATION_TIME["end"], n_points)
+            batch = self.model.simulate_batch(t, self.y0, overrides)
+            self.assertEqual(batch.shape, (len(overrides), n_points, 4))
+            for override, results in zip(overrides, batch):
+                expected = ViralImmunityModel({**self.config.PARAMS, **override}).simulate(t, self.y0)
+                np.testing.assert_allclose(results, expected, rtol=1e-3, atol=1e-3,
+                                           err_msg=f"n_points={n_points} {override}")
+
+    def test_diverging_run_is_nan_without_affecting_others(self):
+        t = np.linspace(0, self.config.SIMULATION_TIME["end"], 200)
+        batch = self.model.simulate_batch(t, self.y0, [{"delta": -10.0}, {}])
+        self.assertTrue(np.isnan(batch[0]).any())
+        self.assertFalse(self.model.check_stability(batch[0]))
+        self.assertTrue(np.isfinite(batch[1]).all())
+        self.assertTrue(self.model.check_stability(batch[1]))
+
+class ImmuneScalingTest(unittest.TestCase):
+    """Checks for the immune activation sigmoid."""
+
+    def test_far_before_tau_is_off(self):
+        # The pure-Python path must not overflow math.exp before activation
+        scaling = getattr(_immune_scaling, "py_func", _immune_scaling)
+        self.assertEqual(scaling(-300.0, 2.0), 0.0)
+        self.assertEqual(_immune_scaling(-300.0, 2.0), 0.0)
+
+    def test_far_after_tau_is_on(self):
+        self.assertEqual(_immune_scaling(300.0, 2.0), 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file